@@ -5,7 +5,8 @@
 # 後で元に戻すためのツール。
 #
 # ここでは Jinja 構文検出に .*? の正規表現は使わず、
-# str.find による手書きスキャナで {{ / {% / {# をたどっていく。
+# UTF-8 バイト列に対する bytes.find (memchr) の手書きスキャナで
+# "{" と "#{" をたどり、"{" は直後の1バイトで {{ / {% / {# を判定する。
 #
 # プレースホルダ形式:
 #   __J2OMIT_<KIND>_<LEN>_<HEX>__
@@ -22,8 +23,14 @@
 import sys
 import re
 import os
+import base64
+import binascii
+import codecs
+import functools
+import operator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional
+from typing import BinaryIO, Callable, Optional
 
 
 # ========= プレースホルダ encode/decode =========
@@ -34,39 +41,99 @@ PH_RE_HEX = re.compile(r"__J2OMIT_([ESCRB])_(\d+)_([0-9a-fA-F]+)__")
 # Base26形式: __J2E_B26:ABCDEF__
 PH_RE_B26 = re.compile(r"__J2([ESCRB])_B26:([A-Z]+)__")
 
+# Base32形式: __J2E_B32:PN5SAYTSN5VWK4TTEB6X2__
+PH_RE_B32 = re.compile(r"__J2([ESCRB])_B32:([A-Z2-7]+)__")
+
+# 3形式をまとめた1本の正規表現 (1回の走査で全形式を拾う)
+# グループ 1-3: 16進数, 4-5: Base26, 6-7: Base32。どれにマッチしたかは m.lastindex で判別する
+PH_RE = re.compile("|".join(p.pattern for p in (PH_RE_HEX, PH_RE_B26, PH_RE_B32)))
+
+# str.splitlines が行区切りとみなす文字 (正規表現の文字クラス用。"\r\n" は別途1つの区切りとして扱う)
+LINE_BREAK_CHARS = r"\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029"
+
+# 行丸ごとコメント: 「# <プレースホルダ>」だけの行。末尾の空白と行区切りまで含めてマッチする
+# グループ 1: インデント, 2: プレースホルダ全体, 3-9: PH_RE の各グループ
+PH_LINE_RE = re.compile(
+    r"(?:^|(?<=[" + LINE_BREAK_CHARS + r"]))"
+    r"([^\S" + LINE_BREAK_CHARS + r"]*)#[^\S" + LINE_BREAK_CHARS + r"]*"
+    r"(" + PH_RE.pattern + r")"
+    r"[^\S" + LINE_BREAK_CHARS + r"]*(?:\r\n|[" + LINE_BREAK_CHARS + r"]|\Z)"
+)
+
+# unmask 用: 行丸ごとコメントとインラインのプレースホルダを1回の走査で拾う
+# インライン側はグループ 10 がプレースホルダ全体, 11-17 が PH_RE の各グループ
+UNMASK_RE = re.compile(PH_LINE_RE.pattern + r"|(" + PH_RE.pattern + r")")
+
 # Base26 encode/decode
+# 1バイト b を chr(65 + b // 26), chr(65 + b % 26) の2文字に展開する変換表
+B26_HI_TABLE = bytes(65 + b // 26 for b in range(256))
+B26_LO_TABLE = bytes(65 + b % 26 for b in range(256))
+# デコード用: 上位桁 A-J → 0, 26, ..., 234 / 下位桁 A-Z → 0-25
+B26_HI_DECODE = bytes.maketrans(bytes(range(65, 75)), bytes(range(0, 260, 26)))
+B26_LO_DECODE = bytes.maketrans(bytes(range(65, 91)), bytes(range(26)))
+# 0-255 に収まる2文字の並び (上位 A-I は下位 A-Z すべて, 上位 J は 234 + 0-21 まで)
+B26_VALID_RE = re.compile(r"(?:[A-I][A-Z]|J[A-V])*")
+
 def encode_b26(data: bytes) -> str:
     """バイト列をBase26エンコード (A-Z のみ使用)"""
-    return "".join(chr(65 + b // 26) + chr(65 + b % 26) for b in data)
+    # 上位桁・下位桁を bytes.translate で一括変換し、ストライド代入で交互に並べる
+    out = bytearray(2 * len(data))
+    out[0::2] = data.translate(B26_HI_TABLE)
+    out[1::2] = data.translate(B26_LO_TABLE)
+    return out.decode("ascii")
 
 def decode_b26(text: str) -> bytes:
     """Base26文字列をバイト列にデコード"""
     if len(text) % 2:
         raise ValueError("B26: odd length")
-    out = bytearray(len(text) // 2)
-    for i in range(0, len(text), 2):
-        hi = ord(text[i]) - 65
-        lo = ord(text[i + 1]) - 65
-        if not (0 <= hi < 26 and 0 <= lo < 26):
-            raise ValueError("B26: non-uppercase letter detected")
-        out[i // 2] = hi * 26 + lo
-    return bytes(out)
+    # 検証は正規表現1回で済ませる。止まった位置の2文字が、先頭から見て最初の不正なペア
+    i = B26_VALID_RE.match(text).end()
+    if i != len(text):
+        if "A" <= text[i] <= "Z" and "A" <= text[i + 1] <= "Z":
+            raise ValueError("byte must be in range(0, 256)")
+        raise ValueError("B26: non-uppercase letter detected")
+    # 上位桁は hi * 26 に、下位桁は 0-25 に translate で一括変換し、足し合わせる
+    raw = text.encode("ascii")
+    return bytes(map(operator.add, raw[0::2].translate(B26_HI_DECODE), raw[1::2].translate(B26_LO_DECODE)))
+
+# Base32 decode (RFC 4648, パディングの "=" は付けない)
+# エンコード側は encode_placeholder_raw で base64.b32encode をバイト列のまま直接使う
+def decode_b32(text: str) -> bytes:
+    """Base32文字列をバイト列にデコード"""
+    return base64.b32decode(text + "=" * (-len(text) % 8))
 
 # プレースホルダ生成 (エンコーディング方式により切り替え)
-def encode_placeholder(kind: str, snippet: str, use_b26: bool = False) -> str:
+def encode_placeholder(kind: str, snippet: str, use_b26: bool = False, use_b32: bool = False) -> str:
     """プレースホルダを生成"""
+    return encode_placeholder_raw(kind, snippet.encode("utf-8"), use_b26, use_b32).decode("ascii")
+
+# プレースホルダの書式。kind ごとに bytes で組み立てておき、bytes の % 書式で1回で埋める
+PH_FMT_HEX = {k: b"__J2OMIT_" + k.encode("ascii") + b"_%d_%s__" for k in "ESCRB"}
+PH_FMT_B26 = {k: b"__J2" + k.encode("ascii") + b"_B26:%s__" for k in "ESCRB"}
+PH_FMT_B32 = {k: b"__J2" + k.encode("ascii") + b"_B32:%s__" for k in "ESCRB"}
+
+# 同じ {{ item }} や {% endif %} が何度も現れるテンプレートが多いので、生成結果をキャッシュする
+@functools.lru_cache(maxsize=4096)
+def encode_placeholder_raw(kind: str, raw: bytes, use_b26: bool = False, use_b32: bool = False) -> bytes:
+    """UTF-8 バイト列のスニペットからプレースホルダ (ASCII バイト列) を生成"""
+    if use_b32:
+        # Base32形式: __J2E_B32:PN5SAYTSN5VWK4TTEB6X2__
+        return PH_FMT_B32[kind] % base64.b32encode(raw).rstrip(b"=")
     if use_b26:
         # Base26形式: __J2E_B26:ABCDEF__
-        raw = snippet.encode("utf-8")
-        b26_str = encode_b26(raw)
-        return f"__J2{kind}_B26:{b26_str}__"
-    else:
-        # 16進数形式: __J2OMIT_E_27_7b7b2062726f6b657273207d7d__
-        raw = snippet.encode("utf-8")
-        length = len(raw)
-        hex_str = raw.hex()
-        return f"__J2OMIT_{kind}_{length}_{hex_str}__"
-
+        return PH_FMT_B26[kind] % encode_b26(raw).encode("ascii")
+    # 16進数形式: __J2OMIT_E_27_7b7b2062726f6b657273207d7d__
+    # hexlify は C 実装の 256 エントリ表引きで 1 バイト → 2 文字に変換するので、
+    # 長いスニペットでも自前の表引きより速い
+    return PH_FMT_HEX[kind] % (len(raw), binascii.hexlify(raw))
+
+def encode_placeholder_into(out: bytearray, kind: str, raw: bytes, use_b26: bool = False, use_b32: bool = False) -> None:
+    """プレースホルダを out に直接書き出す (中間の文字列を作らない)"""
+    out.extend(encode_placeholder_raw(kind, raw, use_b26, use_b32))
+
+# unmask 側も同じプレースホルダが繰り返し現れるので、復元結果をキャッシュする
+# (例外は lru_cache に記録されないので、不正なプレースホルダは毎回エラーになる)
+@functools.lru_cache(maxsize=4096)
 def decode_placeholder_hex(kind: str, length_str: str, hex_str: str) -> str:
     """16進数形式のプレースホルダをデコード"""
     raw = bytes.fromhex(hex_str)
@@ -75,46 +142,63 @@ def decode_placeholder_hex(kind: str, length_str: str, hex_str: str) -> str:
         raise ValueError(f"length mismatch in placeholder: len={length}, actual={len(raw)}")
     return raw.decode("utf-8")
 
+@functools.lru_cache(maxsize=4096)
 def decode_placeholder_b26(kind: str, b26_str: str) -> str:
     """Base26形式のプレースホルダをデコード"""
     raw = decode_b26(b26_str)
     return raw.decode("utf-8")
 
+@functools.lru_cache(maxsize=4096)
+def decode_placeholder_b32(kind: str, b32_str: str) -> str:
+    """Base32形式のプレースホルダをデコード"""
+    raw = decode_b32(b32_str)
+    return raw.decode("utf-8")
+
 
 # ========= ユーティリティ =========
 
-def last_line_start(s: str, i: int) -> int:
+def last_line_start(s: bytes, i: int) -> int:
     """位置 i の属する行の先頭インデックスを返す"""
-    j = s.rfind("\n", 0, i)
+    j = s.rfind(b"\n", 0, i)
     if j < 0:
         return 0
     return j + 1
 
-def next_line_end(s: str, i: int) -> tuple[int, bool]:
+def next_line_end(s: bytes, i: int) -> tuple[int, bool]:
     """位置 i から見た次の改行の位置と、改行があったかどうか"""
     if i >= len(s):
         return len(s), False
-    j = s.find("\n", i)
+    j = s.find(b"\n", i)
     if j < 0:
         return len(s), False
     return j, True
 
-def leading_indent(line: str) -> str:
-    out = []
-    for ch in line:
-        if ch in (" ", "\t"):
-            out.append(ch)
-        else:
-            break
-    return "".join(out)
+def leading_indent(line: bytes) -> bytes:
+    """行頭のスペース・タブ部分を返す"""
+    i = len(line) - len(line.lstrip(b" \t"))
+    return line[:i]
 
 
 # ========= mask 本体（Jinja 構文検出は手書きスキャナ） =========
 
+# "{" の直後の1バイト → トークン種別 (プレースホルダの KIND)
+BRACE_KINDS = {ord("{"): "E", ord("%"): "S", ord("#"): "C"}
+
 # バックスラッシュを含む文字列リテラルを検出
-BACKSLASH_STR = re.compile(r'"(?:[^"\\]|\\.)*"')
+# "(?:[^"\\]|\\.)*" と同じ言語を、1文字ごとの選択を伴わない展開形で書いたもの
+# (エスケープを含まないリテラルもマッチさせて、引用符の対応をずらさないようにしている)
+BACKSLASH_STR = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# 同じ形で閉じの '"' を除いたもの。ストリーム処理で、閉じていないリテラルがどこまで伸びるかを見る
+BACKSLASH_HEAD = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*')
+
+# {% %} / {# #} の行を置き換えるコメントの頭
+COMMENT_HEAD = b"# "
+
+# mask_stream の1回あたりの読み込み量
+STREAM_CHUNK = 1 << 20
 
-def mask_text(s: str, use_b26: bool = False, allow_inline: bool = True, protect_backslash: bool = True) -> str:
+def mask_text(s: str, use_b26: bool = False, allow_inline: bool = True, protect_backslash: bool = True,
+              use_b32: bool = False) -> str:
     """
     Jinja2構文をプレースホルダに置き換える
 
@@ -123,103 +207,193 @@ def mask_text(s: str, use_b26: bool = False, allow_inline: bool = True, protect_
         use_b26: Base26エンコーディングを使用するか (デフォルト: False = 16進数)
         allow_inline: {% %} の行内配置を許可するか (デフォルト: True)
         protect_backslash: バックスラッシュ文字列を保護するか (デフォルト: True)
+        use_b32: Base32エンコーディングを使用するか (デフォルト: False)
     """
-    # バックスラッシュ文字列の保護
-    if protect_backslash:
-        def protect_bs(m: re.Match) -> str:
-            if "\\" in m.group(0):
-                return encode_placeholder("B", m.group(0), use_b26)
-            return m.group(0)
-        s = BACKSLASH_STR.sub(protect_bs, s)
-
-    out = []
-    pos = 0
-    n = len(s)
-    inside_raw = False
+    if use_b26 and use_b32:
+        raise ValueError("Base26 と Base32 は同時に指定できません")
+
+    # Jinja 構文も (保護対象の) バックスラッシュもなければ何も置き換わらないので、そのまま返す
+    # ディレクトリ一括処理ではテンプレートでないファイルも多く、エンコードと走査の準備ごと省ける
+    if ("{{" not in s and "{%" not in s and "{#" not in s and "#{" not in s
+            and (not protect_backslash or "\\" not in s)):
+        return s
+
+    # スキャン本体は UTF-8 バイト列の上で行う。区切り文字はすべて ASCII なので、
+    # バイト位置で切り出してもマルチバイト文字を分断することはない
+    out = mask_bytes(s.encode("utf-8"), use_b26, allow_inline, protect_backslash, use_b32)
+    return out.decode("utf-8")
+
+def mask_bytes(b: bytes, use_b26: bool = False, allow_inline: bool = True, protect_backslash: bool = True,
+               use_b32: bool = False) -> bytearray:
+    """mask_text の本体。UTF-8 バイト列を受け取り、マスク済みのバイト列を返す"""
+    if use_b26 and use_b32:
+        raise ValueError("Base26 と Base32 は同時に指定できません")
+
+    # バックスラッシュ文字列の保護 (バックスラッシュが1つもなければ走査ごと省く)
+    if protect_backslash and b"\\" in b:
+        b, _ = protect_backslash_bytes(b, use_b26, use_b32)
+
+    # 出力は断片のリストではなく1本の bytearray に書き足していき、最後に一度だけデコードする
+    out = bytearray()
+    scan_tokens(b, out, 0, False, True, use_b26, allow_inline, use_b32)
+    return out
+
+def protect_backslash_bytes(b: bytes, use_b26: bool = False, use_b32: bool = False) -> tuple[bytes, int]:
+    """
+    バックスラッシュを含む文字列リテラルを B プレースホルダに置き換える
+
+    置換後のバイト列と、最後にマッチしたリテラルの終端位置 (元の b 上、なければ 0) を返す
+    """
+    last_end = 0
+
+    def protect_bs(m: re.Match) -> bytes:
+        nonlocal last_end
+        last_end = m.end()
+        if b"\\" in m.group(0):
+            return encode_placeholder_raw("B", m.group(0), use_b26, use_b32)
+        return m.group(0)
+
+    return BACKSLASH_STR.sub(protect_bs, b), last_end
+
+def scan_tokens(b: bytes, out: bytearray, pos: int, inside_raw: bool, final: bool,
+                use_b26: bool = False, allow_inline: bool = True, use_b32: bool = False) -> tuple[int, bool]:
+    """
+    b[pos:] の Jinja 構文をプレースホルダに置き換えて out に書き足す
+
+    final=False のときは b を入力の途中までとみなし、後続のデータ次第で結果が変わる
+    トークン (閉じがまだ来ていない、{% %} / {# #} の行末がまだ来ていない) の手前で止まる。
+    戻り値は (走査を再開する位置, raw ブロック内かどうか)
+    b[:pos] は pos の属する行の先頭から残しておくこと (行頭・インデントの判定に使う)
+    """
+    # そのまま写す区間は memoryview のスライス (コピーなし) から直接 extend する
+    mv = memoryview(b)
+    n = len(b)
+
+    # ループ内で何度も引く束縛メソッドはローカル変数に取っておく
+    find = b.find
+    extend = out.extend
+    brace_kind = BRACE_KINDS.get
+
+    # "{" と "#{" の次の出現位置をループをまたいでキャッシュしておき、
+    # 消費済みの領域 (pos より手前) に入ったものだけを探し直す
+    # "#" は Python / YAML のコメントで頻出するので、"#" 単体ではなく "#{" を
+    # 2バイトの needle として find し、"#" の後ろの判定まで C 側で済ませる
+    next_brace = find(b"{", pos)
+    next_hash = find(b"#{", pos)
 
     while pos < n:
-        # 次の {{, {%, {#, #{ を探す
-        idx_expr = s.find("{{", pos)
-        idx_stmt = s.find("{%", pos)
-        idx_comm = s.find("{#", pos)
-        idx_ruby = s.find("#{", pos)  # Ruby style interpolation
-
-        if inside_raw:
-            # raw ブロック内は {{ と {# と #{ を無視
-            idx_expr = -1
-            idx_comm = -1
-            idx_ruby = -1
-
-        # 一番手前のトークンを選ぶ
+        if next_brace != -1 and next_brace < pos:
+            next_brace = find(b"{", pos)
+        if next_hash != -1 and next_hash < pos and not inside_raw:
+            next_hash = find(b"#{", pos)
+
+        # 手前にある方の候補を採る。"{" は直後の1バイトで
+        # {{ (E), {% (S), {# (C) のどれかを判定する
+        # raw ブロック内は {{ と {# と #{ を無視
         min_pos = -1
-        tag = None
-        for idx, t in ((idx_expr, "{{"), (idx_stmt, "{%"), (idx_comm, "{#"), (idx_ruby, "#{")):
-            if idx != -1 and (min_pos == -1 or idx < min_pos):
-                min_pos = idx
-                tag = t
+        kind = None
+        while True:
+            if next_brace != -1 and (inside_raw or next_hash == -1 or next_brace < next_hash):
+                if next_brace + 1 < n:
+                    kind = brace_kind(b[next_brace + 1])
+                    if kind == "S" or (kind is not None and not inside_raw):
+                        min_pos = next_brace
+                        break
+                next_brace = find(b"{", next_brace + 1)
+            elif next_hash != -1 and not inside_raw:
+                # Ruby style interpolation
+                min_pos = next_hash
+                kind = "R"
+                break
+            else:
+                break
 
         if min_pos == -1:
             # もうトークンがない
-            out.append(s[pos:])
+            if final:
+                extend(mv[pos:])
+                pos = n
+            else:
+                # 後続のトークンが行頭から置き換える可能性があるので、最後の改行までだけ書き出す
+                # (末尾の "{" / "#" が次のチャンクでトークンになる場合もここで残る)
+                cut = b.rfind(b"\n", pos) + 1
+                if cut > pos:
+                    extend(mv[pos:cut])
+                    pos = cut
             break
 
-        if tag == "{{":
-            end = s.find("}}", min_pos + 2)
+        if kind == "E":
+            end = find(b"}}", min_pos + 2)
             if end == -1:
+                if not final:
+                    extend(mv[pos:min_pos])
+                    pos = min_pos
+                    break
                 # 閉じがなければ残り全部そのまま
-                out.append(s[pos:])
+                extend(mv[pos:])
+                pos = n
                 break
             # 先頭〜トークン直前
-            out.append(s[pos:min_pos])
-            snippet = s[min_pos:end + 2]
-            out.append(encode_placeholder("E", snippet, use_b26))
+            extend(mv[pos:min_pos])
+            snippet = b[min_pos:end + 2]
+            encode_placeholder_into(out, "E", snippet, use_b26, use_b32)
             pos = end + 2
 
-        elif tag == "#{":
+        elif kind == "R":
             # Ruby style interpolation
-            end = s.find("}", min_pos + 2)
+            end = find(b"}", min_pos + 2)
             if end == -1:
-                out.append(s[pos:])
+                if not final:
+                    extend(mv[pos:min_pos])
+                    pos = min_pos
+                    break
+                extend(mv[pos:])
+                pos = n
                 break
-            out.append(s[pos:min_pos])
-            snippet = s[min_pos:end + 1]
-            out.append(encode_placeholder("R", snippet, use_b26))
+            extend(mv[pos:min_pos])
+            snippet = b[min_pos:end + 1]
+            encode_placeholder_into(out, "R", snippet, use_b26, use_b32)
             pos = end + 1
 
-        elif tag == "{%":
-            end = s.find("%}", min_pos + 2)
+        elif kind == "S":
+            end = find(b"%}", min_pos + 2)
             if end == -1:
-                out.append(s[pos:])
+                if final:
+                    extend(mv[pos:])
+                    pos = n
                 break
 
-            snippet = s[min_pos:end + 2]
-
             # 行境界を取る（行コメント化のため）
-            ls = last_line_start(s, min_pos)
-            le, had_nl = next_line_end(s, end + 2)
-            line = s[ls:le]
+            # {% %} / {# #} は行末まで消費するので、rfind / find が走査するのは各行たかだか1回。
+            # 改行位置の表を前もって作るより (表の構築が全行ぶんかかる) この方が速い
+            ls = last_line_start(b, min_pos)
+            le, had_nl = next_line_end(b, end + 2)
+            if not had_nl and not final:
+                break
+
+            snippet = b[min_pos:end + 2]
+            line = b[ls:le]
 
             # 行内に他のコンテンツがあるかチェック
-            left = s[ls:min_pos].strip()
-            right = s[end + 2:le].strip()
+            left = b[ls:min_pos].decode("utf-8").strip()
+            right = b[end + 2:le].decode("utf-8").strip()
 
             if (left or right) and not allow_inline:
                 # インライン配置が禁止されている場合はエラー
-                snippet_display = line.rstrip("\r\n")
+                snippet_display = line.decode("utf-8").rstrip("\r\n")
                 raise ValueError(f"行内に {{% ... %}} が混在: {snippet_display}")
 
-            indent = leading_indent(line)
-
-            # 行全体をコメントで置き換える
-            out.append(s[pos:ls])
-            ph = encode_placeholder("S", snippet, use_b26)
-            out.append(indent + "# " + ph)
+            # 行全体をコメントで置き換える (インデントは元の行のバイト列をそのまま使う)
+            extend(mv[pos:ls])
+            extend(leading_indent(line))
+            extend(COMMENT_HEAD)
+            encode_placeholder_into(out, "S", snippet, use_b26, use_b32)
             if had_nl:
-                out.append("\n")
+                extend(b"\n")
             pos = le
 
             # raw / endraw の出入り管理
-            inner = s[min_pos+2:end].strip().lower()
+            inner = b[min_pos+2:end].decode("utf-8").strip().lower()
             if inside_raw:
                 if inner.startswith("endraw"):
                     inside_raw = False
@@ -227,101 +401,165 @@ def mask_text(s: str, use_b26: bool = False, allow_inline: bool = True, protect_
                 if inner == "raw" or inner.startswith("raw "):
                     inside_raw = True
 
-        elif tag == "{#":
-            end = s.find("#}", min_pos + 2)
+        else:
+            # {# ... #}
+            end = find(b"#}", min_pos + 2)
             if end == -1:
-                out.append(s[pos:])
+                if final:
+                    extend(mv[pos:])
+                    pos = n
                 break
 
-            snippet = s[min_pos:end + 2]
-            ls = last_line_start(s, min_pos)
-            le, had_nl = next_line_end(s, end + 2)
-            line = s[ls:le]
-            indent = leading_indent(line)
+            ls = last_line_start(b, min_pos)
+            le, had_nl = next_line_end(b, end + 2)
+            if not had_nl and not final:
+                break
 
-            out.append(s[pos:ls])
-            ph = encode_placeholder("C", snippet, use_b26)
-            out.append(indent + "# " + ph)
+            snippet = b[min_pos:end + 2]
+            extend(mv[pos:ls])
+            extend(leading_indent(b[ls:le]))
+            extend(COMMENT_HEAD)
+            encode_placeholder_into(out, "C", snippet, use_b26, use_b32)
             if had_nl:
-                out.append("\n")
+                extend(b"\n")
             pos = le
 
-    return "".join(out)
+    return pos, inside_raw
+
+def backslash_safe_end(b: bytes, last_end: int) -> int:
+    """
+    入力の途中までの b について、バックスラッシュ保護の結果が後続データに左右されない境界を返す
+
+    last_end は b 上で最後にマッチしたリテラルの終端。それ以降の '"' はどれもマッチしなかったもので、
+    バッファ末尾まで読んで失敗したもの (続きが来れば閉じるかもしれない) の手前が境界になる。
+    \\ + 改行で失敗したものは後続データがあっても結果は変わらない
+    """
+    n = len(b)
+    q = b.find(b'"', last_end)
+    while q != -1:
+        if BACKSLASH_HEAD.match(b, q).end() >= n - 1:
+            return q
+        q = b.find(b'"', q + 1)
+    return n
+
+def mask_stream(inp: BinaryIO, out: BinaryIO, use_b26: bool = False, allow_inline: bool = True,
+                protect_backslash: bool = True, use_b32: bool = False, chunk_size: int = STREAM_CHUNK) -> None:
+    """
+    バイナリストリームを chunk_size ずつ読みながらマスクし、確定した部分から書き出す
+
+    結果は入力全体に mask_bytes をかけたものと同じ。保持するのは未確定の末尾
+    (閉じていないトークン・リテラルを含む行以降) だけなので、通常は chunk_size 程度のメモリで済む。
+    入力は UTF-8 として検証し、不正なバイト列があれば UnicodeDecodeError になる
+    (mask_text / --in と同じく、復元できないプレースホルダを作らないため)。
+    エラーで止まった場合 (不正な UTF-8 を含む)、それまでに確定した部分はすでに out に書き出されている
+    """
+    if use_b26 and use_b32:
+        raise ValueError("Base26 と Base32 は同時に指定できません")
+
+    raw_tail = b""      # バックスラッシュ保護が未確定の入力
+    tail = b""          # トークン走査が未確定の部分 (pos の属する行の先頭から)
+    pos = 0             # tail の中で走査を再開する位置
+    inside_raw = False
+    buf = bytearray()
+    # チャンク境界をまたぐマルチバイト文字も扱えるよう、検証はインクリメンタルデコーダで行う
+    # (デコード結果は使わない)
+    check_utf8 = codecs.getincrementaldecoder("utf-8")().decode
+
+    while True:
+        # 未確定部分が長く居座る場合は読み込み量も倍々に増やし、再走査の総量を線形に抑える
+        chunk = inp.read(max(chunk_size, len(raw_tail) + len(tail)))
+        final = not chunk
+        check_utf8(chunk, final)
+
+        data = raw_tail + chunk
+        raw_tail = b""
+        if protect_backslash and b"\\" in data:
+            protected, last_end = protect_backslash_bytes(data, use_b26, use_b32)
+            cut = len(data) if final else backslash_safe_end(data, last_end)
+            # cut 以降にはマッチがないので、置換後の末尾 len(data) - cut バイトは入力そのまま
+            raw_tail = data[cut:]
+            data = protected[:len(protected) - len(raw_tail)]
+        elif protect_backslash and not final and data.count(b'"') % 2:
+            # バックスラッシュがなければリテラルは '"' の対そのもの。
+            # 対になっていない最後の '"' は、続きにバックスラッシュが来ると保護対象になりうる
+            cut = data.rfind(b'"')
+            raw_tail = data[cut:]
+            data = data[:cut]
+
+        b = tail + data
+        pos, inside_raw = scan_tokens(b, buf, pos, inside_raw, final, use_b26, allow_inline, use_b32)
+        if buf:
+            out.write(buf)
+            buf.clear()
+        if final:
+            break
+
+        keep = last_line_start(b, pos)
+        tail = b[keep:]
+        pos -= keep
 
 
 # ========= unmask 本体（プレースホルダだけ正規表現で検出） =========
 
 def unmask_text(s: str, strict: bool = False) -> str:
     """プレースホルダを元のJinja2構文に戻す"""
-    def repl_hex(m: re.Match) -> str:
-        """16進数形式のプレースホルダを復元"""
-        kind, length_str, hex_str = m.groups()
-        try:
-            return decode_placeholder_hex(kind, length_str, hex_str)
-        except Exception as e:
-            if strict:
-                raise
-            sys.stderr.write(f"[WARN] invalid hex placeholder ignored: {m.group(0)} ({e})\n")
-            return m.group(0)
+    # どの形式のプレースホルダも "__J2" で始まる。1つもなければ正規表現の走査ごと省く
+    if "__J2" not in s:
+        return s
 
-    def repl_b26(m: re.Match) -> str:
-        """Base26形式のプレースホルダを復元"""
-        kind, b26_str = m.groups()
+    def restore(m: re.Match, g: int) -> str:
+        """グループ g のプレースホルダを復元 (形式は g 以降のどのグループがマッチしたかで判別)"""
         try:
-            return decode_placeholder_b26(kind, b26_str)
+            if m.group(g + 1) is not None:
+                return decode_placeholder_hex(*m.group(g + 1, g + 2, g + 3))
+            if m.group(g + 4) is not None:
+                return decode_placeholder_b26(*m.group(g + 4, g + 5))
+            return decode_placeholder_b32(*m.group(g + 6, g + 7))
         except Exception as e:
             if strict:
                 raise
-            sys.stderr.write(f"[WARN] invalid b26 placeholder ignored: {m.group(0)} ({e})\n")
-            return m.group(0)
-
-    out_lines = []
-    for line in s.splitlines(keepends=True):
-        # 行丸ごとコメントのパターン: 先頭に「# __J2OMIT_...__」または「# __J2E_B26:...__」
-
-        # 16進数形式をチェック
-        m_full_hex = re.match(r"^(\s*)#\s*(__J2OMIT_[ESCRB]_\d+_[0-9a-fA-F]+__)\s*$", line)
-        if m_full_hex:
-            indent, token = m_full_hex.groups()
-            m = PH_RE_HEX.fullmatch(token)
-            if m:
-                restored = repl_hex(m)
-                out_lines.append(indent + restored + "\n")
-                continue
-
-        # Base26形式をチェック
-        m_full_b26 = re.match(r"^(\s*)#\s*(__J2[ESCRB]_B26:[A-Z]+__)\s*$", line)
-        if m_full_b26:
-            indent, token = m_full_b26.groups()
-            m = PH_RE_B26.fullmatch(token)
-            if m:
-                restored = repl_b26(m)
-                out_lines.append(indent + restored + "\n")
-                continue
-
-        # インラインのプレースホルダも置換
-        line = PH_RE_HEX.sub(repl_hex, line)
-        line = PH_RE_B26.sub(repl_b26, line)
-        out_lines.append(line)
-
-    return "".join(out_lines)
+            fmt = "hex" if m.group(g + 1) is not None else "b26" if m.group(g + 4) is not None else "b32"
+            sys.stderr.write(f"[WARN] invalid {fmt} placeholder ignored: {m.group(g)} ({e})\n")
+            return m.group(g)
+
+    def repl(m: re.Match) -> str:
+        indent = m.group(1)
+        if indent is None:
+            # インラインのプレースホルダ
+            return restore(m, 10)
+        # 行丸ごとコメント: 「# 」と行末の空白を落とし、改行は "\n" にそろえる
+        return indent + restore(m, 2) + "\n"
+
+    # 行に分割せず、テキスト全体を1回だけ走査して置換する
+    return UNMASK_RE.sub(repl, s)
 
 
 # ========= ディレクトリ一括処理 =========
 
-def process_dir(in_dir: Path, out_dir: Path, fn: Callable[[str], str]) -> None:
+def process_dir(in_dir: Path, out_dir: Path, fn: Callable[[str], str], max_workers: Optional[int] = None) -> None:
     """ディレクトリ内のすべてのファイルを再帰的に処理"""
+    def process_one(paths: tuple[Path, Path]) -> None:
+        src_path, out_path = paths
+        try:
+            data = src_path.read_text(encoding="utf-8")
+            out_path.write_text(fn(data), encoding="utf-8")
+        except Exception as exc:
+            raise RuntimeError(f"{src_path}: {exc}") from exc
+
+    # 出力先ディレクトリは先にまとめて作っておく
+    jobs = []
     for root, _, files in os.walk(in_dir):
         rel_root = Path(root).relative_to(in_dir)
         for name in files:
-            src_path = Path(root) / name
             out_path = out_dir / rel_root / name
             out_path.parent.mkdir(parents=True, exist_ok=True)
-            try:
-                data = src_path.read_text(encoding="utf-8")
-                out_path.write_text(fn(data), encoding="utf-8")
-            except Exception as exc:
-                raise RuntimeError(f"{src_path}: {exc}") from exc
+            jobs.append((Path(root) / name, out_path))
+
+    # ファイルは互いに独立なので、読み書きの I/O 待ちをスレッドプールで重ねる
+    # (エラーは os.walk の順で最初に失敗したファイルのものが上がる)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for _ in ex.map(process_one, jobs):
+            pass
 
 
 # ========= CLI =========
@@ -334,6 +572,7 @@ def usage() -> None:
         "  jinja2_mask.py unmask [--in FILE | --in-dir DIR] [--out FILE | --out-dir DIR] [--strict]\n\n"
         "Options for mask:\n"
         "  --use-b26                    Base26エンコーディングを使用 (デフォルト: 16進数)\n"
+        "  --use-b32                    Base32エンコーディングを使用 (出力が Base26 より短い)\n"
         "  --allow-inline-statements    {% %} の行内配置を許可 (デフォルト: 許可)\n"
         "  --no-allow-inline-statements {% %} の行内配置を禁止\n"
         "  --protect-backslash          バックスラッシュ文字列を保護 (デフォルト: 有効)\n"
@@ -361,7 +600,7 @@ def parse_args() -> tuple[str, dict[str, object]]:
     opts: dict[str, object] = {}
     it = iter(sys.argv[2:])
     for arg in it:
-        if arg in ("--use-b26", "--strict", "--allow-inline-statements",
+        if arg in ("--use-b26", "--use-b32", "--strict", "--allow-inline-statements",
                    "--no-allow-inline-statements", "--protect-backslash",
                    "--no-protect-backslash"):
             opts[arg] = True
@@ -388,6 +627,7 @@ def main():
 
     # mask オプション
     use_b26 = bool(opts.get("--use-b26"))
+    use_b32 = bool(opts.get("--use-b32"))
     allow_inline = not bool(opts.get("--no-allow-inline-statements"))
     protect_backslash = not bool(opts.get("--no-protect-backslash"))
 
@@ -396,7 +636,8 @@ def main():
 
     # 処理関数の準備
     if cmd == "mask":
-        fn = lambda text: mask_text(text, use_b26=use_b26, allow_inline=allow_inline, protect_backslash=protect_backslash)
+        fn = lambda text: mask_text(text, use_b26=use_b26, allow_inline=allow_inline, protect_backslash=protect_backslash,
+                                    use_b32=use_b32)
     elif cmd == "unmask":
         fn = lambda text: unmask_text(text, strict=strict)
     else:
@@ -411,6 +652,13 @@ def main():
             process_dir(Path(in_dir), Path(out_dir), fn)
             return
 
+        # 標準入出力どうしの mask は全体を読み込まず、チャンク単位で流す
+        if cmd == "mask" and not in_file and not out_file:
+            mask_stream(sys.stdin.buffer, sys.stdout.buffer, use_b26=use_b26, allow_inline=allow_inline,
+                        protect_backslash=protect_backslash, use_b32=use_b32)
+            sys.stdout.buffer.flush()
+            return
+
         # ファイル処理
         if in_file:
             src = Path(in_file).read_text(encoding="utf-8")